@@ -20,15 +20,18 @@ Run:
 from __future__ import annotations
 
 import argparse
+import cmath
+import contextlib
 import itertools
 import json
 import math
+import operator
 import os
 import random
 import sys
-from collections.abc import Generator, Iterable
+from collections.abc import Generator, Iterable, Iterator
 from dataclasses import dataclass
-from typing import Any, Literal, cast
+from typing import Any, Literal, TextIO, cast
 
 Point = tuple[float, float]
 
@@ -79,14 +82,14 @@ def _as_dict(x: Any, path: str) -> dict[str, Any]:
 # -------------------------
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TurtleState:
     x: float
     y: float
     heading_deg: float
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SvgStyle:
     stroke: str = "#000"
     stroke_width: float = 1.0
@@ -95,7 +98,7 @@ class SvgStyle:
     stroke_linejoin: str = "round"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class RenderConfig:
     name: str
     axiom: str
@@ -117,6 +120,11 @@ class RenderConfig:
     height: float | None
     style: SvgStyle
     background: str | None
+    simplify: float | None = None
+    merge_collinear: bool = False
+    dedupe_segments: bool = False
+    single_path: bool = False
+    instance_shapes: bool = False
 
 
 # -------------------------
@@ -124,35 +132,61 @@ class RenderConfig:
 # -------------------------
 
 
+# Longest word rewritten in one piece by stream_expand.  Longer words are split
+# into chunks of this size, which bounds memory regardless of iterations.
+_EXPAND_CHUNK_SIZE = 4096
+
+# Words with more generations still to apply than this are rewritten one
+# generation at a time and split into single symbols, like a plain depth-first
+# walk.  Otherwise every level of a very deep expansion would build a whole
+# chunk before the first symbol could be yielded.
+_EXPAND_WHOLE_WORD_DEPTH = 32
+
+
 def stream_expand(
     axiom: str, rules: dict[str, str], iterations: int
 ) -> Generator[str, None, None]:
     """Yield expanded symbols in order without building the full string.
 
-    Uses an explicit stack of (string, index, depth) frames.
+    Each generation is rewritten with ``str.translate`` (one C-level pass per
+    generation instead of a Python stack frame per symbol).  Words longer than
+    ``_EXPAND_CHUNK_SIZE`` are split into chunks that are expanded and yielded
+    left to right, so only a bounded window of the expansion is ever held in
+    memory.  Words that grow slowly (e.g. linearly), or that have more than
+    ``_EXPAND_WHOLE_WORD_DEPTH`` generations to go, are split into single
+    symbols instead, so the first symbol arrives in O(iterations) rather than
+    after rewriting a whole chunk per generation.
     """
     _require(iterations >= 0, "iterations must be >= 0")
 
-    # Frame: (current_string, index, depth)
-    stack: list[tuple[str, int, int]] = [(axiom, 0, 0)]
+    table = {ord(k): v for k, v in rules.items()}
+
+    # Frame: (word, generations still to apply)
+    stack: list[tuple[str, int]] = [(axiom, iterations)]
 
     while stack:
-        s, i, d = stack.pop()
-        if i >= len(s):
-            continue
+        word, depth = stack.pop()
+        while depth and len(word) <= _EXPAND_CHUNK_SIZE:
+            rewritten = word.translate(table)
+            if rewritten == word:
+                # A fixed point: every later generation is the same word.
+                depth = 0
+                break
+            grew = 2 * len(rewritten) >= 3 * len(word)
+            word = rewritten
+            depth -= 1
+            if not grew or depth > _EXPAND_WHOLE_WORD_DEPTH:
+                break
 
-        ch = s[i]
-        # Push continuation of current frame
-        stack.append((s, i + 1, d))
+        if not depth:
+            yield from word
+            continue
 
-        if d < iterations and ch in rules:
-            repl = rules[ch]
-            # Push replacement AFTER continuation so it sits on top of the
-            # stack and is popped first.  This preserves left-to-right symbol
-            # order: continuation waits while replacement is fully traversed.
-            stack.append((repl, 0, d + 1))
-        else:
-            yield ch
+        # Rewriting is context-free, so pieces expand independently.  Push
+        # them in reverse so the leftmost piece is popped (and yielded) first.
+        size = _EXPAND_CHUNK_SIZE if len(word) > _EXPAND_CHUNK_SIZE else 1
+        for i in reversed(range(0, len(word), size)):
+            stack.append((word[i : i + size], depth))
 
 
 # -------------------------
@@ -160,28 +194,174 @@ def stream_expand(
 # -------------------------
 
 
-@dataclass
+@dataclass(slots=True)
 class PolylineBuffer:
     polylines: list[list[Point]]
 
-    def start_new(self, p: Point) -> None:
-        self.polylines.append([p])
+    def start_new(self, p: Point) -> list[Point]:
+        pl = [p]
+        self.polylines.append(pl)
+        return pl
+
+
+_DefaultAction = Literal["forward_draw", "forward_move", "noop"]
+
+# A compiled command is an (opcode, argument) pair.  The argument is the step
+# length for draw/move and the heading delta in degrees for turn (turn and
+# turn_abs compile to the same opcode); it is unused otherwise.
+_OP_NOOP, _OP_DRAW, _OP_MOVE, _OP_TURN, _OP_PUSH, _OP_POP = range(6)
+_Op = tuple[int, float]
+
+
+def _compile_action(
+    sym: str, action: dict[str, Any], angle_deg: float, step: float
+) -> _Op:
+    """Validate one command-table entry and reduce it to an (opcode, arg) pair."""
+    atype = action.get("type")
+    _require(
+        isinstance(atype, str), f"command for '{sym}' must have string field 'type'"
+    )
+
+    if atype == "noop":
+        return (_OP_NOOP, 0.0)
+
+    if atype == "turn":
+        direction = action.get("direction")
+        _require(
+            isinstance(direction, int)
+            and not isinstance(direction, bool)
+            and direction in (-1, 1),
+            f"turn command for '{sym}' must have direction -1 or 1",
+        )
+        a = action.get("angle", 1)
+        # If a looks like a multiplier (default 1) we multiply by base angle.
+        # If user wants an absolute number of degrees, they can use turn_abs.
+        _require(
+            isinstance(a, (int, float)),
+            f"turn command for '{sym}' field 'angle' must be a number",
+        )
+        return (_OP_TURN, cast(int, direction) * float(a) * angle_deg)
+
+    if atype == "turn_abs":
+        return (_OP_TURN, _as_float(action.get("angle"), f"command '{sym}'.angle"))
+
+    if atype == "push":
+        return (_OP_PUSH, 0.0)
+
+    if atype == "pop":
+        return (_OP_POP, 0.0)
+
+    if atype == "forward":
+        draw = action.get("draw")
+        _require(
+            isinstance(draw, bool),
+            f"forward command for '{sym}' must have boolean field 'draw'",
+        )
+        mult = action.get("step", 1)
+        _require(
+            isinstance(mult, (int, float)),
+            f"forward command for '{sym}' field 'step' must be a number",
+        )
+        return (_OP_DRAW if draw else _OP_MOVE, step * float(mult))
+
+    raise ConfigError(f"Unknown command type '{atype}' for symbol '{sym}'")
+
 
-    def current(self) -> list[Point]:
-        if not self.polylines:
-            raise RuntimeError("current() called before start_new()")
-        return self.polylines[-1]
+class _CompiledCommands(dict[str, _Op]):
+    """Symbol -> compiled command, filled in the first time a symbol is seen.
 
-    def add_point(self, p: Point) -> None:
-        cur = self.current()
-        if not cur:
-            cur.append(p)
+    Hits are a single C-level dict lookup.  Compiling lazily keeps the error
+    behaviour of the command table: a malformed command only raises once its
+    symbol actually occurs in the stream.
+    """
+
+    def __init__(
+        self,
+        commands: dict[str, dict[str, Any]],
+        default_op: _Op,
+        angle_deg: float,
+        step: float,
+    ) -> None:
+        super().__init__()
+        self.commands = commands
+        self.default_op = default_op
+        self.angle_deg = angle_deg
+        self.step = step
+
+    def __missing__(self, sym: str) -> _Op:
+        action = self.commands.get(sym)
+        if action is None:
+            op = self.default_op
         else:
-            if cur[-1] != p:
-                cur.append(p)
+            op = _compile_action(sym, action, self.angle_deg, self.step)
+        self[sym] = op
+        return op
 
 
-_DefaultAction = Literal["forward_draw", "forward_move", "noop"]
+_complex_to_point = operator.attrgetter("real", "imag")
+
+
+def _single_stroke_tables(
+    commands: dict[str, dict[str, Any]],
+    angle_deg: float,
+    step: float,
+) -> tuple[dict[str, float], dict[str, float]] | None:
+    """Reduce a command table to per-symbol heading deltas and draw distances.
+
+    Returns None unless every command is a well-formed drawing forward, turn,
+    turn_abs or noop, i.e. the whole program traces one unbroken stroke.
+    Anything else (push/pop, pen-up moves, zero-length steps, malformed
+    actions) is left to the general interpreter, which also reports errors.
+    """
+    turns: dict[str, float] = {}
+    # Every listed symbol gets an entry so that only unlisted symbols fall
+    # back to the default action; 0.0 marks "does not draw".
+    dists: dict[str, float] = dict.fromkeys(commands, 0.0)
+    for sym, action in commands.items():
+        try:
+            op, arg = _compile_action(sym, action, angle_deg, step)
+        except ConfigError:
+            return None
+        if op == _OP_TURN:
+            turns[sym] = arg
+        elif op == _OP_DRAW and arg:
+            dists[sym] = arg
+        elif op != _OP_NOOP:
+            return None
+    return turns, dists
+
+
+def _interpret_single_stroke(
+    symbols: Iterable[str],
+    *,
+    turns: dict[str, float],
+    dists: dict[str, float],
+    default_dist: float,
+    start: TurtleState,
+) -> list[list[Point]]:
+    """Trace a branch-free, pen-down program as cumulative sums.
+
+    The heading is a running sum of turn deltas and the position a running
+    sum of ``cmath.rect`` steps, so the per-symbol work runs in C through
+    ``itertools`` instead of the interpreter loop.  The float operations (and
+    their order) match the general loop exactly, so the output is identical.
+    """
+    s_turn, s_draw, s_dist = itertools.tee(symbols, 3)
+    no_turn = itertools.repeat(0.0)
+    headings = itertools.accumulate(
+        map(turns.get, s_turn, no_turn), initial=start.heading_deg
+    )
+    draw_headings = itertools.compress(
+        headings, map(dists.get, s_draw, itertools.repeat(default_dist))
+    )
+    lengths = filter(None, map(dists.get, s_dist, itertools.repeat(default_dist)))
+    moves = map(cmath.rect, lengths, map(math.radians, draw_headings))
+    positions = itertools.accumulate(moves, initial=complex(start.x, start.y))
+    # groupby collapses consecutive equal points, like the zero-length draw
+    # check in interpret_to_polylines.
+    distinct = map(operator.itemgetter(0), itertools.groupby(positions))
+    pl: list[Point] = list(map(_complex_to_point, distinct))
+    return [pl] if len(pl) >= 2 else []
 
 
 def interpret_to_polylines(
@@ -218,102 +398,78 @@ def interpret_to_polylines(
         ),
     )
 
+    if default_action != "forward_move":
+        tables = _single_stroke_tables(commands, angle_deg, step)
+        if tables is not None:
+            return _interpret_single_stroke(
+                symbols,
+                turns=tables[0],
+                dists=tables[1],
+                default_dist=step if default_action == "forward_draw" else 0.0,
+                start=start,
+            )
+
     x, y, h = start.x, start.y, start.heading_deg
 
     buf = PolylineBuffer(polylines=[])
-    buf.start_new((x, y))
-
-    # stack stores turtle state plus a flag whether we should continue current polyline
-    stack: list[TurtleState] = []
+    # The active polyline always ends at the pen position (x, y), so drawing
+    # only needs to compare the new coordinates against x and y to drop
+    # zero-length segments, without building a tuple for the comparison.
+    cur = buf.start_new((x, y))
+
+    # Saved (x, y, heading) triples; a plain tuple is cheaper to build and
+    # unpack than a TurtleState on every push/pop.
+    stack: list[tuple[float, float, float]] = []
+
+    # Headings only take a handful of distinct values (multiples of the turn
+    # angle), so cos/sin are computed once per heading rather than per step.
+    trig: dict[float, tuple[float, float]] = {}
+
+    if default_action == "forward_draw":
+        default_op = (_OP_DRAW, step)
+    elif default_action == "forward_move":
+        default_op = (_OP_MOVE, step)
+    else:
+        default_op = (_OP_NOOP, 0.0)
+    ops = _CompiledCommands(commands, default_op, angle_deg, step)
 
     for sym in symbols:
-        action = commands.get(sym)
-        if action is None:
-            if default_action == "forward_draw":
-                action = {"type": "forward", "draw": True}
-            elif default_action == "forward_move":
-                action = {"type": "forward", "draw": False}
+        op, arg = ops[sym]
+
+        if op == _OP_DRAW or op == _OP_MOVE:
+            cs = trig.get(h)
+            if cs is None:
+                rad = math.radians(h)
+                cs = trig[h] = (math.cos(rad), math.sin(rad))
+            nx = x + arg * cs[0]
+            ny = y + arg * cs[1]
+
+            if op == _OP_DRAW:
+                if nx != x or ny != y:
+                    cur.append((nx, ny))
             else:
-                action = {"type": "noop"}
-
-        atype = action.get("type")
-        _require(
-            isinstance(atype, str), f"command for '{sym}' must have string field 'type'"
-        )
-
-        if atype == "noop":
-            continue
+                # Move without drawing: start a new polyline at destination
+                cur = buf.start_new((nx, ny))
 
-        if atype == "turn":
-            direction = action.get("direction")
-            _require(
-                direction in (-1, 1),
-                f"turn command for '{sym}' must have direction -1 or 1",
-            )
-            if not isinstance(direction, int):
-                raise TypeError(
-                    f"Expected int direction, got {type(direction).__name__}"
-                )
-            a = action.get("angle", 1)
-            if isinstance(a, (int, float)):
-                # If a looks like a multiplier (default 1) we multiply by base angle.
-                # If user wants an absolute number of degrees, they can use turn_abs.
-                h += direction * float(a) * angle_deg
-            else:
-                raise ConfigError(
-                    f"turn command for '{sym}' field 'angle' must be a number"
-                )
-            continue
+            x, y = nx, ny
 
-        if atype == "turn_abs":
-            a = action.get("angle")
-            h += _as_float(a, f"command '{sym}'.angle")
-            continue
+        elif op == _OP_TURN:
+            h += arg
 
-        if atype == "push":
+        elif op == _OP_PUSH:
             # Do NOT start a new polyline here.  The branch geometry begins
             # from the current pen position and is appended to the active
             # polyline.  A new polyline is started only on `pop` (after
             # restoring state) to prevent an unwanted connecting stroke from
             # the branch tip back to the trunk continuation point.
-            stack.append(TurtleState(x, y, h))
-            continue
+            stack.append((x, y, h))
 
-        if atype == "pop":
+        elif op == _OP_POP:
             _require(bool(stack), f"pop command '{sym}' encountered with empty stack")
-            st = stack.pop()
-            x, y, h = st.x, st.y, st.heading_deg
+            x, y, h = stack.pop()
             # Start a new polyline at the restored point to prevent unwanted
             # connecting strokes.
-            buf.start_new((x, y))
-            continue
-
-        if atype == "forward":
-            draw = action.get("draw")
-            _require(
-                isinstance(draw, bool),
-                f"forward command for '{sym}' must have boolean field 'draw'",
-            )
-            mult = action.get("step", 1)
-            _require(
-                isinstance(mult, (int, float)),
-                f"forward command for '{sym}' field 'step' must be a number",
-            )
-            dist = step * float(mult)
-            rad = math.radians(h)
-            nx = x + dist * math.cos(rad)
-            ny = y + dist * math.sin(rad)
-
-            if draw:
-                buf.add_point((nx, ny))
-            else:
-                # Move without drawing: start a new polyline at destination
-                buf.start_new((nx, ny))
-
-            x, y = nx, ny
-            continue
-
-        raise ConfigError(f"Unknown command type '{atype}' for symbol '{sym}'")
+            cur = buf.start_new((x, y))
 
     # Cleanup: remove empty or 1-point polylines
     out: list[list[Point]] = []
@@ -323,6 +479,121 @@ def interpret_to_polylines(
     return out
 
 
+# -------------------------
+# Geometry simplification
+# -------------------------
+
+
+def dedupe_segments(polylines: list[list[Point]], precision: int) -> list[list[Point]]:
+    """Drop segments that retrace one already drawn, in either direction.
+
+    Endpoints are compared after rounding to ``precision`` decimals, i.e. as
+    they would be written.  Surviving segments stay joined; a polyline is
+    only split where a duplicate was cut out of it.
+    """
+    seen: set[tuple[Point, Point]] = set()
+    out: list[list[Point]] = []
+    for pl in polylines:
+        if len(pl) < 2:
+            continue
+        run: list[Point] = []
+        prev = pl[0]
+        kp = (round(prev[0], precision), round(prev[1], precision))
+        for p in itertools.islice(pl, 1, None):
+            kq = (round(p[0], precision), round(p[1], precision))
+            key = (kp, kq) if kp <= kq else (kq, kp)
+            if key in seen:
+                if len(run) >= 2:
+                    out.append(run)
+                run = []
+            else:
+                seen.add(key)
+                if not run:
+                    run.append(prev)
+                run.append(p)
+            prev, kp = p, kq
+        if len(run) >= 2:
+            out.append(run)
+    return out
+
+
+# Largest |cross| / dot (the tangent of the turn) still treated as straight.
+_COLLINEAR_TOLERANCE = 1e-9
+
+
+def merge_collinear(points: list[Point]) -> list[Point]:
+    """Drop interior points where the stroke carries straight on.
+
+    A point is dropped only when the segments on either side of it point the
+    same way (up to rounding noise), so the drawing is unchanged; points
+    where the stroke doubles back are kept.
+    """
+    if len(points) < 3:
+        return points
+
+    out = [points[0]]
+    ax, ay = points[0]
+    bx, by = points[1]
+    for cx, cy in itertools.islice(points, 2, None):
+        d1x = bx - ax
+        d1y = by - ay
+        d2x = cx - bx
+        d2y = cy - by
+        cross = d1x * d2y - d1y * d2x
+        dot = d1x * d2x + d1y * d2y
+        if abs(cross) > _COLLINEAR_TOLERANCE * dot:
+            out.append((bx, by))
+            ax, ay = bx, by
+        bx, by = cx, cy
+    out.append((bx, by))
+    return out
+
+
+def simplify_polyline(points: list[Point], tolerance: float) -> list[Point]:
+    """Drop points that lie within ``tolerance`` of the simplified stroke.
+
+    Ramer-Douglas-Peucker with an explicit stack, so long polylines do not
+    hit the recursion limit.  Distances are measured to the segment rather
+    than to its infinite line, so a stroke that doubles back on itself keeps
+    its turning point.  Endpoints are always kept.
+    """
+    n = len(points)
+    if n < 3:
+        return points
+
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    tol2 = tolerance * tolerance
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        ax, ay = points[first]
+        bx, by = points[last]
+        dx = bx - ax
+        dy = by - ay
+        seg2 = dx * dx + dy * dy
+
+        worst = -1.0
+        index = first
+        for i in range(first + 1, last):
+            px, py = points[i]
+            t = ((px - ax) * dx + (py - ay) * dy) / seg2 if seg2 else 0.0
+            t = min(max(t, 0.0), 1.0)
+            ex = ax + t * dx - px
+            ey = ay + t * dy - py
+            d2 = ex * ex + ey * ey
+            if d2 > worst:
+                worst = d2
+                index = i
+
+        if worst > tol2:
+            keep[index] = True
+            stack.append((index, last))
+            stack.append((first, index))
+
+    return list(itertools.compress(points, keep))
+
+
 # -------------------------
 # SVG writing
 # -------------------------
@@ -350,20 +621,72 @@ def compute_bounds(polylines: list[list[Point]]) -> tuple[float, float, float, f
 
 
 def _fmt(x: float, precision: int) -> str:
-    # Normalise -0.0 so it never produces "-0" in SVG output.
-    if not x:
-        x = 0.0
     # Strip trailing zeros for nicer SVG.
     s = f"{x:.{precision}f}"
     if "." in s:
         s = s.rstrip("0").rstrip(".")
-    return s or "0"
+    # Normalise -0.0 (and negatives that round to zero) so it never produces
+    # "-0" in SVG output.
+    return "0" if s == "-0" else s
+
+
+_NEGATIVE_ZERO = {"-0": "0"}
+
+
+def _iter_point_strings(
+    polylines: list[list[Point]], precision: int
+) -> Generator[str, None, None]:
+    """Yield the SVG ``points`` value for each polyline.
+
+    Equivalent to calling _fmt on every coordinate, but run as one chain of
+    C-level map/str operations over all coordinates instead of two Python
+    calls per point.
+    """
+    coords = itertools.chain.from_iterable(itertools.chain.from_iterable(polylines))
+    nums: Iterator[str] = map(f"%.{precision}f".__mod__, coords)
+    if precision:
+        nums = map(str.rstrip, nums, itertools.repeat("0"))
+        nums = map(str.rstrip, nums, itertools.repeat("."))
+    keys, nums = itertools.tee(nums)
+    nums = map(_NEGATIVE_ZERO.get, keys, nums)
+    pairs = map(",".join, zip(nums, nums, strict=True))
+    for pl in polylines:
+        yield " ".join(itertools.islice(pairs, len(pl)))
+
+
+def _instance_shapes(
+    polylines: list[list[Point]], precision: int
+) -> tuple[list[str], list[tuple[int, str, str]]]:
+    """Split polylines into unique shapes and the placements that reuse them.
+
+    Each polyline is taken relative to its first point, and shapes are
+    considered equal when their formatted points are.  Offsets are taken
+    between coordinates already rounded to ``precision``, so origin + offset
+    lands exactly on the point the plain output would write.  Returns the
+    points value of every unique shape, and (shape index, x, y) for every
+    polyline in order.
+    """
+    relative = []
+    for pl in polylines:
+        if pl:
+            rounded = [(round(x, precision), round(y, precision)) for x, y in pl]
+            x0, y0 = rounded[0]
+            relative.append([(x - x0, y - y0) for x, y in rounded])
+    origins = _iter_point_strings([pl[:1] for pl in polylines if pl], precision)
+    index: dict[str, int] = {}
+    placements = []
+    for pts, origin in zip(
+        _iter_point_strings(relative, precision), origins, strict=True
+    ):
+        x, y = origin.split(",")
+        placements.append((index.setdefault(pts, len(index)), x, y))
+    return list(index), placements
 
 
 def write_svg(
     polylines: list[list[Point]],
     *,
-    out_path: str,
+    out_path: str | os.PathLike[str] | TextIO,
     margin: float,
     precision: int,
     flip_y: bool,
@@ -372,7 +695,13 @@ def write_svg(
     style: SvgStyle,
     background: str | None,
     title: str | None = None,
+    single_path: bool = False,
+    instance_shapes: bool = False,
 ) -> None:
+    _require(
+        not (single_path and instance_shapes),
+        "svg.single_path and svg.instance_shapes cannot be combined.",
+    )
     minx, miny, maxx, maxy = compute_bounds(polylines)
 
     # Add margin in user units before checking dimensions so that valid
@@ -399,58 +728,87 @@ def write_svg(
         f"{_fmt(h, precision)}"
     )
 
-    lines: list[str] = []
-    lines.append('<?xml version="1.0" encoding="UTF-8"?>')
-    lines.append(
-        '<svg xmlns="http://www.w3.org/2000/svg" version="1.1" '
-        f'viewBox="{view_box}"{svg_w_attr}{svg_h_attr}>'
-    )
-
-    if title:
-        # Keep it short; SVG title is helpful in editors.
-        safe_title = (
-            title.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-        )
-        lines.append(f"  <title>{safe_title}</title>")
-
-    if background and background.lower() != "none":
-        # Background rect in viewBox coordinates.
-        lines.append(
-            f'  <rect x="{_fmt(minx, precision)}" y="{_fmt(miny, precision)}" '
-            f'width="{_fmt(w, precision)}" height="{_fmt(h, precision)}" '
-            f'fill="{background}" />'
-        )
-
     style_attr = (
         f'stroke="{style.stroke}" stroke-width="{_fmt(style.stroke_width, precision)}" '
         f'fill="{style.fill}" stroke-linecap="{style.stroke_linecap}" '
         f'stroke-linejoin="{style.stroke_linejoin}"'
     )
 
-    if flip_y:
-        # Flip around the center line: easiest is to apply a transform that scales y
-        # by -1.
-        # Since viewBox is in absolute coordinates, we flip about y = (miny + maxy).
-        # That is: translate(0, miny+maxy) scale(1,-1)
-        flip_y_line = _fmt(miny + maxy, precision)
-        lines.append(f'  <g transform="translate(0,{flip_y_line}) scale(1,-1)">')
-        indent = "    "
+    # Everything is written straight to a buffered file as it is formatted, so
+    # the document is never held in memory as a whole.  An already-open text
+    # stream (e.g. io.StringIO) is written to as is and left open.
+    out: contextlib.AbstractContextManager[TextIO]
+    if isinstance(out_path, (str, os.PathLike)):
+        path = os.fspath(out_path)
+        _ensure_parent_dir(path)
+        out = open(path, "w", encoding="utf-8", buffering=1 << 20)
     else:
-        indent = "  "
+        out = contextlib.nullcontext(out_path)
+    # SVG 1.1 readers only resolve <use> references through xlink:href.
+    xlink_attr = (
+        'xmlns:xlink="http://www.w3.org/1999/xlink" ' if instance_shapes else ""
+    )
+    with out as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write(
+            '<svg xmlns="http://www.w3.org/2000/svg" version="1.1" '
+            f"{xlink_attr}"
+            f'viewBox="{view_box}"{svg_w_attr}{svg_h_attr}>\n'
+        )
 
-    for pl in polylines:
-        pts = " ".join(f"{_fmt(x, precision)},{_fmt(y, precision)}" for x, y in pl)
-        lines.append(f'{indent}<polyline points="{pts}" {style_attr} />')
+        if title:
+            # Keep it short; SVG title is helpful in editors.
+            safe_title = (
+                title.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+            )
+            f.write(f"  <title>{safe_title}</title>\n")
+
+        if background and background.lower() != "none":
+            # Background rect in viewBox coordinates.
+            f.write(
+                f'  <rect x="{_fmt(minx, precision)}" y="{_fmt(miny, precision)}" '
+                f'width="{_fmt(w, precision)}" height="{_fmt(h, precision)}" '
+                f'fill="{background}" />\n'
+            )
 
-    if flip_y:
-        lines.append("  </g>")
+        if instance_shapes:
+            shapes, placements = _instance_shapes(polylines, precision)
+            f.write("  <defs>\n")
+            for i, pts in enumerate(shapes):
+                f.write(f'    <polyline id="s{i}" points="{pts}" {style_attr} />\n')
+            f.write("  </defs>\n")
+
+        if flip_y:
+            # Flip around the center line: easiest is to apply a transform that
+            # scales y by -1.
+            # Since viewBox is in absolute coordinates, we flip about
+            # y = (miny + maxy).  That is: translate(0, miny+maxy) scale(1,-1)
+            flip_y_line = _fmt(miny + maxy, precision)
+            f.write(f'  <g transform="translate(0,{flip_y_line}) scale(1,-1)">\n')
+            indent = "    "
+        else:
+            indent = "  "
+
+        if instance_shapes:
+            for i, x, y in placements:
+                f.write(f'{indent}<use xlink:href="#s{i}" x="{x}" y="{y}" />\n')
+        elif single_path:
+            # One element for the whole drawing: each polyline becomes a
+            # subpath, whose coordinate pairs after the M are implicit lineto.
+            f.write(f'{indent}<path d="')
+            sep = ""
+            for pts in _iter_point_strings(polylines, precision):
+                f.write(f"{sep}M{pts}")
+                sep = " "
+            f.write(f'" {style_attr} />\n')
+        else:
+            for pts in _iter_point_strings(polylines, precision):
+                f.write(f'{indent}<polyline points="{pts}" {style_attr} />\n')
 
-    lines.append("</svg>")
+        if flip_y:
+            f.write("  </g>\n")
 
-    _ensure_parent_dir(out_path)
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
-        f.write("\n")
+        f.write("</svg>\n")
 
 
 # -------------------------
@@ -496,6 +854,15 @@ def parse_config(obj: dict[str, Any]) -> RenderConfig:
             "turtle.commands keys must be single-character strings",
         )
         commands[sym] = _as_dict(action, f"turtle.commands['{sym}']")
+        # Reject malformed actions up front, even for symbols that never occur
+        # in the expansion; the interpreter then only compiles known-good ones.
+        _compile_action(sym, commands[sym], angle_deg, step)
+
+    # Commands for symbols the expansion can never produce do not affect the
+    # drawing.  Dropping them lets a bracket-free system take the single-stroke
+    # path even when its command table also defines push/pop.
+    alphabet = set(axiom).union(*rules.values())
+    commands = {sym: a for sym, a in commands.items() if sym in alphabet}
 
     svg = _as_dict(obj.get("svg", {}), "svg")
     margin = _as_float(svg.get("margin", 10), "svg.margin")
@@ -531,6 +898,19 @@ def parse_config(obj: dict[str, Any]) -> RenderConfig:
     if background is not None:
         background = _as_str(background, "svg.background")
 
+    simplify = svg.get("simplify")
+    if simplify is not None:
+        simplify = _as_float(simplify, "svg.simplify")
+        _require(simplify >= 0, "svg.simplify must be >= 0")
+    merge = _as_bool(svg.get("merge_collinear", False), "svg.merge_collinear")
+    dedupe = _as_bool(svg.get("dedupe_segments", False), "svg.dedupe_segments")
+    single_path = _as_bool(svg.get("single_path", False), "svg.single_path")
+    instance_shapes = _as_bool(svg.get("instance_shapes", False), "svg.instance_shapes")
+    _require(
+        not (single_path and instance_shapes),
+        "svg.single_path and svg.instance_shapes cannot be combined.",
+    )
+
     return RenderConfig(
         name=name,
         axiom=axiom,
@@ -547,6 +927,11 @@ def parse_config(obj: dict[str, Any]) -> RenderConfig:
         height=height,
         style=style,
         background=background,
+        simplify=simplify,
+        merge_collinear=merge,
+        dedupe_segments=dedupe,
+        single_path=single_path,
+        instance_shapes=instance_shapes,
     )
 
 
@@ -789,6 +1174,30 @@ SVG options
         Adds a background rect. Example: "white" or "#fff". Use "none" (default)
         to omit.
 
+    svg.simplify: number >= 0 (optional)
+        If set, drops points that lie within this distance (in turtle units) of
+        the simplified stroke (Ramer-Douglas-Peucker). Endpoints and turning
+        points of strokes that double back are kept. Omit to write every point.
+
+    svg.merge_collinear: boolean (default false)
+        If true, drops interior points where a stroke carries straight on, e.g.
+        between consecutive forward steps with no turn. The drawing is unchanged.
+
+    svg.dedupe_segments: boolean (default false)
+        If true, drops segments that retrace one already drawn (compared at
+        svg.precision, in either direction), e.g. branches drawn twice. Useful
+        for plotters. Applied before merge_collinear and simplify.
+
+    svg.single_path: boolean (default false)
+        If true, writes the whole drawing as one <path> element with a subpath
+        ("M x,y x,y ...") per stroke instead of one <polyline> per stroke.
+        Smaller files and far fewer DOM nodes for branching systems.
+
+    svg.instance_shapes: boolean (default false)
+        If true, writes each distinct stroke shape once in <defs> and places
+        every stroke with a <use> element. Branching systems repeat a handful
+        of shapes thousands of times. Cannot be combined with svg.single_path.
+
     svg.style: object (optional)
         style.stroke: string (default "#000")
         style.stroke_width: number (default 1)
@@ -891,6 +1300,14 @@ def cmd_render(
         start=cfg.start,
         default_action=default_action,
     )
+    # Dedupe first: retraced steps match segment for segment only before
+    # merging or simplification reshapes them.
+    if cfg.dedupe_segments:
+        polylines = dedupe_segments(polylines, cfg.precision)
+    if cfg.merge_collinear:
+        polylines = [merge_collinear(pl) for pl in polylines]
+    if cfg.simplify is not None:
+        polylines = [simplify_polyline(pl, cfg.simplify) for pl in polylines]
 
     write_svg(
         polylines,
@@ -903,6 +1320,8 @@ def cmd_render(
         style=cfg.style,
         background=cfg.background,
         title=cfg.name,
+        single_path=cfg.single_path,
+        instance_shapes=cfg.instance_shapes,
     )
 
 
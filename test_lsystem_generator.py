@@ -1,9 +1,15 @@
 #!/usr/bin/env python3
 import io
+import itertools
 import json
+import math
 import os
-import tempfile
+import re
+import time
+import xml.etree.ElementTree as ET
+from collections.abc import Iterator
 from contextlib import redirect_stderr
+from pathlib import Path
 from typing import Any
 
 import pytest
@@ -15,16 +21,31 @@ from lsystem_generator import (
     SvgStyle,
     TurtleState,
     compute_bounds,
+    dedupe_segments,
     generate_random_config,
     interpret_to_polylines,
     load_json,
     main,
+    merge_collinear,
     parse_config,
+    simplify_polyline,
     stream_expand,
     write_svg,
 )
 
 
+@pytest.fixture(scope="session")
+def tmp_svg_dir(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """One scratch directory shared by every test that writes an SVG."""
+    return tmp_path_factory.mktemp("svgs")
+
+
+@pytest.fixture
+def svg_out(tmp_svg_dir: Path, request: pytest.FixtureRequest) -> str:
+    """A per-test output path inside the shared SVG directory."""
+    return str(tmp_svg_dir / f"{request.node.name}.svg")
+
+
 class TestConfigParsing:
     def test_basic_config(self) -> None:
         config_data = {
@@ -74,6 +95,23 @@ class TestConfigParsing:
         with pytest.raises(ConfigError):
             parse_config({"axiom": "F", "turtle": {}, "svg": {"precision": 15}})
 
+    def test_malformed_command_for_unused_symbol(self) -> None:
+        # Command actions are validated at parse time, not on first use.
+        turtle = {"commands": {"Q": {"type": "forward", "draw": "yes"}}}
+        with pytest.raises(ConfigError, match="'Q'"):
+            parse_config({"axiom": "F", "turtle": turtle, "svg": {}})
+
+    @pytest.mark.parametrize("direction", [1.0, True, 2])
+    def test_turn_direction_must_be_int(self, direction: Any) -> None:
+        turtle = {"commands": {"Q": {"type": "turn", "direction": direction}}}
+        with pytest.raises(ConfigError, match="direction -1 or 1"):
+            parse_config({"axiom": "F", "turtle": turtle, "svg": {}})
+
+    def test_single_path_excludes_instance_shapes(self) -> None:
+        svg = {"single_path": True, "instance_shapes": True}
+        with pytest.raises(ConfigError, match="cannot be combined"):
+            parse_config({"axiom": "F", "turtle": {}, "svg": svg})
+
 
 class TestExpansion:
     def test_simple_expansion(self) -> None:
@@ -82,47 +120,112 @@ class TestExpansion:
         axiom = "A"
 
         # n=0: A
-        gen0 = list(stream_expand(axiom, rules, 0))
-        assert "".join(gen0) == "A"
+        assert "".join(stream_expand(axiom, rules, 0)) == "A"
 
         # n=1: AB
-        gen1 = list(stream_expand(axiom, rules, 1))
-        assert "".join(gen1) == "AB"
+        assert "".join(stream_expand(axiom, rules, 1)) == "AB"
 
         # n=2: ABA
-        gen2 = list(stream_expand(axiom, rules, 2))
-        assert "".join(gen2) == "ABA"
+        assert "".join(stream_expand(axiom, rules, 2)) == "ABA"
 
         # n=3: ABAAB
-        gen3 = list(stream_expand(axiom, rules, 3))
-        assert "".join(gen3) == "ABAAB"
+        assert "".join(stream_expand(axiom, rules, 3)) == "ABAAB"
 
     def test_no_rules(self) -> None:
         # If no rules match, symbols should remain unchanged
         rules: dict[str, str] = {}
         axiom = "F+-F"
-        gen = list(stream_expand(axiom, rules, 5))
-        assert "".join(gen) == "F+-F"
+        assert "".join(stream_expand(axiom, rules, 5)) == "F+-F"
+
+    def test_fixed_point_stops_early(self) -> None:
+        # Once no symbol is rewritten, further generations are the identity,
+        # so even an absurd iteration count returns at once.
+        assert "".join(stream_expand("F+F", {}, 10**9)) == "F+F"
+        assert "".join(stream_expand("AB", {"A": "B"}, 10**9)) == "BB"
+
+    @pytest.mark.parametrize(
+        ("rules", "head"),
+        [
+            # Linear growth: one symbol per generation.
+            ({"A": "AB"}, ["A", "B", "B"]),
+            # Exponential growth, far deeper than could ever be expanded.
+            ({"A": "A+A"}, ["A", "+", "A"]),
+        ],
+    )
+    def test_deep_expansion_yields_first_symbols_promptly(
+        self, rules: dict[str, str], head: list[str]
+    ) -> None:
+        # Rewriting a whole chunk per generation would take minutes to reach
+        # the first symbol at this depth.
+        start = time.perf_counter()
+        assert list(itertools.islice(stream_expand("A", rules, 200_000), 3)) == head
+        assert time.perf_counter() - start < 5
+
+    def test_linear_growth_expands_fully(self) -> None:
+        assert "".join(stream_expand("A", {"A": "AB"}, 50)) == "A" + "B" * 50
 
     def test_zero_iterations_with_rules(self) -> None:
         # At iterations=0 the axiom must pass through unchanged even when rules exist
         rules = {"F": "F+F", "X": "FF"}
         assert "".join(stream_expand("FX", rules, 0)) == "FX"
 
+    def test_matches_naive_rewrite_across_chunks(self) -> None:
+        # Algae at n=20 has 17711 symbols, well past the chunk size, so the
+        # chunked path must reproduce the whole-word rewrite exactly.
+        rules = {"A": "AB", "B": "A"}
+        word = "A"
+        for _ in range(20):
+            word = "".join(rules.get(c, c) for c in word)
+        assert "".join(stream_expand("A", rules, 20)) == word
+
+
+def _reference_turtle(symbols: str, cfg: RenderConfig) -> list[list[Point]]:
+    """Straightforward scalar turtle used as an oracle for the interpreter.
+
+    No compiled dispatch, caching or fast paths: one dict lookup and, for
+    moves, one cos/sin per symbol.  Unknown symbols draw forward.
+    """
+    x, y, h = cfg.start.x, cfg.start.y, cfg.start.heading_deg
+    stack: list[tuple[float, float, float]] = []
+    polylines: list[list[Point]] = [[(x, y)]]
+    for sym in symbols:
+        action = cfg.commands.get(sym, {"type": "forward", "draw": True})
+        kind = action["type"]
+        if kind == "forward":
+            dist = cfg.step * action.get("step", 1)
+            rad = math.radians(h)
+            nx, ny = x + dist * math.cos(rad), y + dist * math.sin(rad)
+            if not action["draw"]:
+                polylines.append([(nx, ny)])
+            elif polylines[-1][-1] != (nx, ny):
+                polylines[-1].append((nx, ny))
+            x, y = nx, ny
+        elif kind == "turn":
+            h += action["direction"] * action.get("angle", 1) * cfg.angle_deg
+        elif kind == "turn_abs":
+            h += action["angle"]
+        elif kind == "push":
+            stack.append((x, y, h))
+        elif kind == "pop":
+            x, y, h = stack.pop()
+            polylines.append([(x, y)])
+    return [pl for pl in polylines if len(pl) >= 2]
+
 
 class TestTurtle:
-    def setup_method(self) -> None:
-        self.start = TurtleState(x=0, y=0, heading_deg=0)
-        self.commands: dict[str, dict[str, Any]] = {
-            "F": {"type": "forward", "draw": True},
-            "f": {"type": "forward", "draw": False},
-            "+": {"type": "turn", "direction": 1},
-            "-": {"type": "turn", "direction": -1},
-            "[": {"type": "push"},
-            "]": {"type": "pop"},
-        }
-        self.angle = 90
-        self.step = 10
+    # Shared by every test and never mutated; tests needing extra commands
+    # build a new dict from this one.
+    start = TurtleState(x=0, y=0, heading_deg=0)
+    commands: dict[str, dict[str, Any]] = {
+        "F": {"type": "forward", "draw": True},
+        "f": {"type": "forward", "draw": False},
+        "+": {"type": "turn", "direction": 1},
+        "-": {"type": "turn", "direction": -1},
+        "[": {"type": "push"},
+        "]": {"type": "pop"},
+    }
+    angle = 90
+    step = 10
 
     def test_forward_draw(self) -> None:
         # Move forward 10 units along +X (heading 0)
@@ -139,10 +242,10 @@ class TestTurtle:
         p0 = polylines[0][0]
         p1 = polylines[0][1]
 
-        assert p0[0] == pytest.approx(0)
-        assert p0[1] == pytest.approx(0)
-        assert p1[0] == pytest.approx(10)
-        assert p1[1] == pytest.approx(0)
+        assert p0[0] == 0
+        assert p0[1] == 0
+        assert p1[0] == 10
+        assert p1[1] == 0
 
     def test_branching(self) -> None:
         # F[+F]F
@@ -172,12 +275,13 @@ class TestTurtle:
         # Verify coordinates of first polyline
         pl1 = polylines[0]
         assert len(pl1) == 3
-        assert pl1[0][0] == pytest.approx(0)
-        assert pl1[0][1] == pytest.approx(0)
-        assert pl1[1][0] == pytest.approx(10)
-        assert pl1[1][1] == pytest.approx(0)
-        assert pl1[2][0] == pytest.approx(10)
-        assert pl1[2][1] == pytest.approx(10)
+        assert pl1[0][0] == 0
+        assert pl1[0][1] == 0
+        assert pl1[1][0] == 10
+        assert pl1[1][1] == 0
+        # After the 90-degree turn cos() is only approximately zero.
+        assert pl1[2][0] == pytest.approx(10, abs=1e-9)
+        assert pl1[2][1] == 10
 
     def test_turn_abs(self) -> None:
         # turn_abs sets heading by adding an absolute angle delta
@@ -210,10 +314,47 @@ class TestTurtle:
             default_action="noop",
         )
         assert len(polylines) == 2
-        assert polylines[0][0][0] == pytest.approx(0)
-        assert polylines[0][-1][0] == pytest.approx(10)
-        assert polylines[1][0][0] == pytest.approx(20)
-        assert polylines[1][-1][0] == pytest.approx(30)
+        assert polylines[0][0][0] == 0
+        assert polylines[0][-1][0] == 10
+        assert polylines[1][0][0] == 20
+        assert polylines[1][-1][0] == 30
+
+    def test_zero_length_draw_adds_no_point(self) -> None:
+        # "Z" draws with a zero step; it must not duplicate the pen position,
+        # including right after a pop restarts the polyline.
+        commands = {**self.commands, "Z": {"type": "forward", "draw": True, "step": 0}}
+        polylines = interpret_to_polylines(
+            "FZ[+F]ZF",
+            commands=commands,
+            angle_deg=self.angle,
+            step=self.step,
+            start=self.start,
+        )
+        assert [len(pl) for pl in polylines] == [3, 2]
+
+    def test_single_stroke_matches_general_loop(self) -> None:
+        # Without push/pop/pen-up commands the interpreter takes the
+        # cumulative-sum fast path; an unused "[" forces the general loop.
+        commands: dict[str, dict[str, Any]] = {
+            "F": {"type": "forward", "draw": True, "step": 1.5},
+            "+": {"type": "turn", "direction": 1, "angle": 0.5},
+            "-": {"type": "turn", "direction": -1},
+            "T": {"type": "turn_abs", "angle": 17},
+            "X": {"type": "noop"},
+        }
+        symbols = "".join(stream_expand("X", {"X": "F+XT-GF-X", "F": "FF"}, 5))
+        fast = interpret_to_polylines(
+            symbols, commands=commands, angle_deg=30, step=3, start=self.start
+        )
+        general = interpret_to_polylines(
+            symbols,
+            commands={**commands, "[": {"type": "push"}},
+            angle_deg=30,
+            step=3,
+            start=self.start,
+        )
+        assert len(fast) == 1
+        assert fast == general
 
     def test_pop_empty_stack(self) -> None:
         with pytest.raises(ConfigError):
@@ -225,6 +366,68 @@ class TestTurtle:
                 start=self.start,
             )
 
+    def test_consumes_symbols_lazily(self) -> None:
+        # The interpreter must iterate the stream once, not materialise it: an
+        # error at the second symbol means nothing after it is ever pulled.
+        pulled: list[str] = []
+
+        def probe() -> Iterator[str]:
+            for sym in "F]" + "F" * 1000:
+                pulled.append(sym)
+                yield sym
+
+        with pytest.raises(ConfigError):
+            interpret_to_polylines(
+                probe(),
+                commands=self.commands,
+                angle_deg=self.angle,
+                step=self.step,
+                start=self.start,
+            )
+        assert pulled == ["F", "]"]
+
+    def test_unused_branch_commands_do_not_change_result(self) -> None:
+        # "[" and "]" never occur in the expansion, so parse_config drops them
+        # and the single-stroke path runs; the general loop (which any table
+        # with push/pop takes) must produce the same polylines.
+        commands: dict[str, dict[str, Any]] = {
+            "F": {"type": "forward", "draw": True},
+            "+": {"type": "turn", "direction": 1},
+            "-": {"type": "turn", "direction": -1},
+            "[": {"type": "push"},
+            "]": {"type": "pop"},
+        }
+        cfg = parse_config(
+            {
+                "axiom": "F",
+                "iterations": 3,
+                "rules": {"F": "F+F--F+F"},
+                "turtle": {"angle": 60, "commands": commands},
+            }
+        )
+        assert set(cfg.commands) == {"F", "+", "-"}
+        results = [
+            interpret_to_polylines(
+                stream_expand(cfg.axiom, cfg.rules, cfg.iterations),
+                commands=table,
+                angle_deg=cfg.angle_deg,
+                step=cfg.step,
+                start=cfg.start,
+            )
+            for table in (cfg.commands, commands)
+        ]
+        assert results[0] == results[1]
+        assert len(results[0]) == 1
+
+    def test_matches_reference_interpreter(
+        self, example_artifacts: tuple[str, RenderConfig, list[list[Point]]]
+    ) -> None:
+        # Covers both the general loop (fractal_tree) and the single-stroke
+        # path (koch, hilbert); results must agree bit for bit.
+        _, cfg, polylines = example_artifacts
+        symbols = "".join(stream_expand(cfg.axiom, cfg.rules, cfg.iterations))
+        assert polylines == _reference_turtle(symbols, cfg)
+
     def test_invalid_default_action(self) -> None:
         with pytest.raises(ConfigError):
             interpret_to_polylines(
@@ -247,30 +450,93 @@ class TestTurtle:
             default_action="forward_draw",
         )
         assert len(polylines) == 1
-        assert polylines[0][1][0] == pytest.approx(10)
+        assert polylines[0][1][0] == 10
 
 
 class TestComputeBounds:
     def test_basic_bounds(self) -> None:
         polylines = [[(0.0, 5.0), (10.0, -2.0)], [(3.0, 8.0), (7.0, 1.0)]]
         min_x, min_y, max_x, max_y = compute_bounds(polylines)
-        assert min_x == pytest.approx(0.0)
-        assert min_y == pytest.approx(-2.0)
-        assert max_x == pytest.approx(10.0)
-        assert max_y == pytest.approx(8.0)
+        assert min_x == 0.0
+        assert min_y == -2.0
+        assert max_x == 10.0
+        assert max_y == 8.0
 
     def test_collinear_horizontal(self) -> None:
         # All points on the same horizontal line: height (y-span) is zero
         polylines = [[(0.0, 0.0), (5.0, 0.0), (10.0, 0.0)]]
         min_x, min_y, max_x, max_y = compute_bounds(polylines)
-        assert min_y == pytest.approx(0.0)
-        assert max_y == pytest.approx(0.0)
-        assert (max_x - min_x) == pytest.approx(10.0)
+        assert min_y == 0.0
+        assert max_y == 0.0
+        assert (max_x - min_x) == 10.0
 
     def test_empty_polylines_raises(self) -> None:
         with pytest.raises(ConfigError):
             compute_bounds([])
 
+    def test_matches_flat_min_max(
+        self, example_artifacts: tuple[str, RenderConfig, list[list[Point]]]
+    ) -> None:
+        # Contract for any faster implementation: identical to min/max over
+        # the flattened coordinate columns of real geometry.
+        _, _, polylines = example_artifacts
+        xs = [x for pl in polylines for x, _ in pl]
+        ys = [y for pl in polylines for _, y in pl]
+        assert compute_bounds(polylines) == (min(xs), min(ys), max(xs), max(ys))
+
+
+class TestSimplify:
+    def test_drops_collinear_points(self) -> None:
+        pl: list[Point] = [(0, 0), (1, 0), (2, 0), (2, 1), (2, 2)]
+        assert simplify_polyline(pl, 0.001) == [(0, 0), (2, 0), (2, 2)]
+
+    def test_keeps_turning_point_of_reversal(self) -> None:
+        # The tip at (3, 0) lies on the line through the endpoints but not on
+        # the segment between them, so it must survive.
+        pl: list[Point] = [(0, 0), (3, 0), (1, 0)]
+        assert simplify_polyline(pl, 0.001) == pl
+
+    def test_tolerance_threshold(self) -> None:
+        pl: list[Point] = [(0, 0), (1, 0.5), (2, 0)]
+        assert simplify_polyline(pl, 0.4) == pl
+        assert simplify_polyline(pl, 0.6) == [(0, 0), (2, 0)]
+
+    def test_negative_tolerance_rejected(self) -> None:
+        with pytest.raises(ConfigError):
+            parse_config({"axiom": "F", "turtle": {}, "svg": {"simplify": -1}})
+
+    def test_dedupe_segments(self) -> None:
+        polylines: list[list[Point]] = [
+            [(0, 0), (1, 0), (1, 1)],
+            # Retraces (1,1)-(1,0) backwards, then goes somewhere new.
+            [(1, 1), (1.0001, 0), (2, 0)],
+            [(0, 0), (1, 0)],
+        ]
+        assert dedupe_segments(polylines, 2) == [
+            [(0, 0), (1, 0), (1, 1)],
+            [(1.0001, 0), (2, 0)],
+        ]
+
+    def test_dedupe_segments_skips_short_polylines(self) -> None:
+        # Empty and single-point polylines have no segments to keep.
+        polylines: list[list[Point]] = [[], [(0, 0)], [(0, 0), (1, 0)]]
+        assert dedupe_segments(polylines, 2) == [[(0, 0), (1, 0)]]
+
+    def test_merge_collinear(self) -> None:
+        pl: list[Point] = [(0, 0), (1, 0), (2, 0), (2, 1), (2, 2), (2, 0.5)]
+        # Straight runs collapse; the right angle and the reversal survive.
+        assert merge_collinear(pl) == [(0, 0), (2, 0), (2, 2), (2, 0.5)]
+
+
+_SVG_NS = "{http://www.w3.org/2000/svg}"
+_XLINK_HREF = "{http://www.w3.org/1999/xlink}href"
+_DEFAULT_STYLE = SvgStyle()
+
+
+def _svg_tree(content: str) -> ET.Element:
+    """Parse SVG text once so tests can query elements and attributes."""
+    return ET.fromstring(content)
+
 
 class TestEndToEnd:
     def _render(
@@ -285,31 +551,56 @@ class TestEndToEnd:
         style: SvgStyle | None = None,
         background: str | None = None,
         title: str | None = None,
+        single_path: bool = False,
+        instance_shapes: bool = False,
     ) -> str:
-        """Helper: write SVG to a temp file and return its content."""
+        """Helper: write SVG to an in-memory buffer and return its content."""
         if style is None:
-            style = SvgStyle()
-        with tempfile.TemporaryDirectory() as tmpdir:
-            out_path = os.path.join(tmpdir, "out.svg")
-            write_svg(
-                polylines,
-                out_path=out_path,
-                margin=margin,
-                precision=precision,
-                flip_y=flip_y,
-                width=width,
-                height=height,
-                style=style,
-                background=background,
-                title=title,
-            )
-            with open(out_path) as f:
-                return f.read()
+            style = _DEFAULT_STYLE
+        buf = io.StringIO()
+        write_svg(
+            polylines,
+            out_path=buf,
+            margin=margin,
+            precision=precision,
+            flip_y=flip_y,
+            width=width,
+            height=height,
+            style=style,
+            background=background,
+            title=title,
+            single_path=single_path,
+            instance_shapes=instance_shapes,
+        )
+        return buf.getvalue()
 
-    def test_write_svg(self) -> None:
+    def test_write_svg(self, svg_out: str) -> None:
         polylines: list[list[Point]] = [[(0.0, 0.0), (10.0, 10.0)]]
-        with tempfile.TemporaryDirectory() as tmpdir:
-            out_path = os.path.join(tmpdir, "test.svg")
+        write_svg(
+            polylines,
+            out_path=svg_out,
+            margin=0,
+            precision=2,
+            flip_y=False,
+            width=None,
+            height=None,
+            style=_DEFAULT_STYLE,
+            background=None,
+        )
+
+        assert os.path.exists(svg_out)
+        with open(svg_out) as f:
+            content = f.read()
+            assert "<svg" in content
+            assert 'points="0,0 10,10"' in content
+
+    def test_write_svg_to_path_and_stream(self, tmp_path: Path) -> None:
+        # A pathlib.Path is opened (creating missing parent directories) just
+        # like a str path; a text stream is written to directly.
+        polylines: list[list[Point]] = [[(0.0, 0.0), (10.0, 10.0)]]
+        target = tmp_path / "nested" / "out.svg"
+        buf = io.StringIO()
+        for out_path in (target, buf):
             write_svg(
                 polylines,
                 out_path=out_path,
@@ -318,35 +609,85 @@ class TestEndToEnd:
                 flip_y=False,
                 width=None,
                 height=None,
-                style=SvgStyle(),
+                style=_DEFAULT_STYLE,
                 background=None,
             )
+        assert not buf.closed
+        assert 'points="0,0 10,10"' in buf.getvalue()
+        assert target.read_text(encoding="utf-8") == buf.getvalue()
+
+    def test_write_svg_number_formatting(self) -> None:
+        # Trailing zeros are stripped and anything that rounds to zero is
+        # written as "0", never "-0".
+        content = self._render(
+            [[(-0.0001, 1.5), (10.25, -0.0), (3.0, 100.0)]], precision=2
+        )
+        assert 'points="0,1.5 10.25,0 3,100"' in content
 
-            assert os.path.exists(out_path)
-            with open(out_path) as f:
-                content = f.read()
-                assert "<svg" in content
-                assert 'points="0,0 10,10"' in content
+    def test_write_svg_single_path(self) -> None:
+        content = self._render(
+            [[(0.0, 0.0), (10.0, 5.0)], [(1.0, 1.0), (2.0, 2.0), (3.0, 1.0)]],
+            single_path=True,
+        )
+        assert "<polyline" not in content
+        paths = _svg_tree(content).findall(f"{_SVG_NS}path")
+        assert [p.attrib["d"] for p in paths] == ["M0,0 10,5 M1,1 2,2 3,1"]
+
+    def test_write_svg_instance_shapes(self) -> None:
+        content = self._render(
+            [
+                [(0.0, 0.0), (1.0, 2.0)],
+                [(5.0, 5.0), (5.0, 6.0)],
+                [(-3.0, 0.5), (-2.0, 2.5)],
+            ],
+            instance_shapes=True,
+        )
+        tree = _svg_tree(content)
+        shapes = tree.findall(f"{_SVG_NS}defs/{_SVG_NS}polyline")
+        assert [(p.attrib["id"], p.attrib["points"]) for p in shapes] == [
+            ("s0", "0,0 1,2"),
+            ("s1", "0,0 0,1"),
+        ]
+        uses = [u.attrib for u in tree.findall(f"{_SVG_NS}use")]
+        assert uses == [
+            {_XLINK_HREF: "#s0", "x": "0", "y": "0"},
+            {_XLINK_HREF: "#s1", "x": "5", "y": "5"},
+            {_XLINK_HREF: "#s0", "x": "-3", "y": "0.5"},
+        ]
+
+    def test_write_svg_instance_shapes_keep_points_exact(self) -> None:
+        # Offsets are taken between rounded coordinates: 0.004 -> 1.006 is
+        # written as 0 + 1.01, like the plain "0,0 1.01,0", not 0 + 1.
+        tree = _svg_tree(
+            self._render([[(0.004, 0.0), (1.006, 0.0)]], instance_shapes=True)
+        )
+        shape = tree.find(f"{_SVG_NS}defs/{_SVG_NS}polyline")
+        assert shape is not None
+        assert shape.attrib["points"] == "0,0 1.01,0"
 
     def test_write_svg_flip_y(self) -> None:
-        content = self._render([[(0.0, 0.0), (10.0, 5.0)]], flip_y=True)
-        assert 'transform="translate(' in content
-        assert "scale(1,-1)" in content
+        tree = _svg_tree(self._render([[(0.0, 0.0), (10.0, 5.0)]], flip_y=True))
+        group = tree.find(f"{_SVG_NS}g")
+        assert group is not None
+        assert group.attrib["transform"] == "translate(0,5) scale(1,-1)"
 
     def test_write_svg_background(self) -> None:
         content = self._render([[(0.0, 0.0), (10.0, 5.0)]], background="#ff0000")
-        assert "<rect" in content
-        assert 'fill="#ff0000"' in content
+        rect = _svg_tree(content).find(f"{_SVG_NS}rect")
+        assert rect is not None
+        assert rect.attrib["fill"] == "#ff0000"
 
     def test_write_svg_width_height(self) -> None:
         content = self._render([[(0.0, 0.0), (10.0, 5.0)]], width=200.0, height=100.0)
-        assert 'width="200"' in content
-        assert 'height="100"' in content
+        tree = _svg_tree(content)
+        assert tree.attrib["width"] == "200"
+        assert tree.attrib["height"] == "100"
 
     def test_write_svg_title(self) -> None:
         content = self._render([[(0.0, 0.0), (10.0, 5.0)]], title="My <L-System>")
-        assert "<title>" in content
         assert "My &lt;L-System&gt;" in content
+        # Escaped correctly, so it parses back to the original text.
+        assert _svg_tree(content).findtext(f"{_SVG_NS}title") == "My <L-System>"
 
     def test_random_generator(self) -> None:
         cfg = generate_random_config(seed=42)
@@ -355,97 +696,116 @@ class TestEndToEnd:
         assert "turtle" in cfg
         assert isinstance(cfg["iterations"], int)
 
-        # Determinism check
-        cfg2 = generate_random_config(seed=42)
-        assert cfg == cfg2
+        # Determinism check on the serialised form, which is what the random
+        # command writes; this also pins key order.
+        first = json.dumps(cfg)
+        assert json.dumps(generate_random_config(seed=42)) == first
 
 
 class TestLoadJson:
-    def test_malformed_json(self) -> None:
-        with tempfile.NamedTemporaryFile(suffix=".json", mode="w", delete=False) as tmp:
-            tmp.write("{ not valid json }")
-            tmp_path = tmp.name
-        try:
-            with pytest.raises(ConfigError):
-                load_json(tmp_path)
-        finally:
-            os.unlink(tmp_path)
+    def test_malformed_json(self, tmp_path: Path) -> None:
+        bad = tmp_path / "bad.json"
+        bad.write_text("{ not valid json }")
+        with pytest.raises(ConfigError):
+            load_json(str(bad))
 
 
 _EXAMPLE_DIR = os.path.join(os.path.dirname(__file__), "example")
+_EXAMPLES = {
+    name: os.path.join(_EXAMPLE_DIR, name)
+    for name in ("koch.json", "fractal_tree.json", "hilbert_curve.json")
+}
+
+# Structural markers every rendered SVG must contain, found in one scan.
+_SVG_MARKERS = re.compile(r"<svg|<polyline|viewBox=")
+
+# Per-example invariants: (polyline count, viewBox).  These pin the geometry
+# without depending on the last printed digit of every coordinate.
+_EXPECTED_LAYOUT = {
+    "koch.json": (1, "-10 -10 830 253.827"),
+    "fractal_tree.json": (1458, "-61.04854 -0.03 122.09708 254.06"),
+    "hilbert_curve.json": (1, "-0.03 -0.03 63.06 63.06"),
+}
+_VIEW_BOX = re.compile(r'viewBox="([^"]*)"')
 
 
 class TestCLI:
     def test_validate_command(self) -> None:
-        koch = os.path.join(_EXAMPLE_DIR, "koch.json")
-        assert main(["validate", koch]) == 0
+        assert main(["validate", _EXAMPLES["koch.json"]]) == 0
+
+    def test_validate_deep_exponential_config(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        # The preview is bounded: a config far too deep to ever render must
+        # still validate quickly, from a sample of the expansion.
+        cfg = tmp_path / "deep.json"
+        cfg.write_text(
+            json.dumps({"axiom": "F", "iterations": 20000, "rules": {"F": "F+F"}})
+        )
+        start = time.perf_counter()
+        assert main(["validate", str(cfg)]) == 0
+        assert time.perf_counter() - start < 5
+        assert "symbols (sampled): 10000+" in capsys.readouterr().out
 
-    def test_render_command(self) -> None:
-        koch = os.path.join(_EXAMPLE_DIR, "koch.json")
-        with tempfile.TemporaryDirectory() as tmpdir:
-            out = os.path.join(tmpdir, "out.svg")
-            assert main(["render", koch, out]) == 0
-            assert os.path.exists(out)
+    def test_render_command(self, svg_out: str) -> None:
+        assert main(["render", _EXAMPLES["koch.json"], svg_out]) == 0
+        assert os.path.exists(svg_out)
 
     def test_file_not_found_returns_error_code(self) -> None:
         with redirect_stderr(io.StringIO()):
             assert main(["render", "nonexistent_config.json", "out.svg"]) == 2
 
-    def test_invalid_config_returns_error_code(self) -> None:
-        with tempfile.NamedTemporaryFile(suffix=".json", mode="w", delete=False) as tmp:
-            json.dump({"axiom": "F", "iterations": "bad", "turtle": {}, "svg": {}}, tmp)
-            tmp_path = tmp.name
-        try:
-            with redirect_stderr(io.StringIO()):
-                assert main(["validate", tmp_path]) == 2
-        finally:
-            os.unlink(tmp_path)
+    def test_invalid_config_returns_error_code(self, tmp_path: Path) -> None:
+        bad = tmp_path / "bad.json"
+        bad.write_text(
+            json.dumps({"axiom": "F", "iterations": "bad", "turtle": {}, "svg": {}})
+        )
+        with redirect_stderr(io.StringIO()):
+            assert main(["validate", str(bad)]) == 2
+
+
+@pytest.fixture(scope="session", params=list(_EXAMPLES))
+def example_artifacts(
+    request: pytest.FixtureRequest,
+) -> tuple[str, RenderConfig, list[list[Point]]]:
+    """Parse, expand and interpret one example config once per session."""
+    cfg = parse_config(load_json(_EXAMPLES[request.param]))
+    symbols = stream_expand(cfg.axiom, cfg.rules, cfg.iterations)
+    polylines = interpret_to_polylines(
+        symbols,
+        commands=cfg.commands,
+        angle_deg=cfg.angle_deg,
+        step=cfg.step,
+        start=cfg.start,
+    )
+    return request.param, cfg, polylines
 
 
 class TestExampleConfigs:
     """Regression tests: every example config must render without error."""
 
-    def _render_example(self, filename: str) -> str:
-        """Parse, expand, interpret, and write SVG; return SVG content."""
-        path = os.path.join(_EXAMPLE_DIR, filename)
-        cfg = parse_config(load_json(path))
-        symbols = stream_expand(cfg.axiom, cfg.rules, cfg.iterations)
-        polylines = interpret_to_polylines(
-            symbols,
-            commands=cfg.commands,
-            angle_deg=cfg.angle_deg,
-            step=cfg.step,
-            start=cfg.start,
+    def test_renders(
+        self,
+        example_artifacts: tuple[str, RenderConfig, list[list[Point]]],
+    ) -> None:
+        name, cfg, polylines = example_artifacts
+        buf = io.StringIO()
+        write_svg(
+            polylines,
+            out_path=buf,
+            margin=cfg.margin,
+            precision=cfg.precision,
+            flip_y=cfg.flip_y,
+            width=cfg.width,
+            height=cfg.height,
+            style=cfg.style,
+            background=cfg.background,
+            title=cfg.name,
         )
-        with tempfile.TemporaryDirectory() as tmpdir:
-            out = os.path.join(tmpdir, "out.svg")
-            write_svg(
-                polylines,
-                out_path=out,
-                margin=cfg.margin,
-                precision=cfg.precision,
-                flip_y=cfg.flip_y,
-                width=cfg.width,
-                height=cfg.height,
-                style=cfg.style,
-                background=cfg.background,
-                title=cfg.name,
-            )
-            with open(out) as f:
-                return f.read()
-
-    def test_koch(self) -> None:
-        content = self._render_example("koch.json")
-        assert "<svg" in content
-        assert "<polyline" in content
-        assert "viewBox=" in content
-
-    def test_fractal_tree(self) -> None:
-        content = self._render_example("fractal_tree.json")
-        assert "<svg" in content
-        assert "<polyline" in content
-
-    def test_hilbert_curve(self) -> None:
-        content = self._render_example("hilbert_curve.json")
-        assert "<svg" in content
-        assert "<polyline" in content
+        content = buf.getvalue()
+        assert set(_SVG_MARKERS.findall(content)) == {"<svg", "<polyline", "viewBox="}
+
+        count, view_box = _EXPECTED_LAYOUT[name]
+        assert content.count("<polyline") == count
+        match = _VIEW_BOX.search(content)
+        assert match is not None and match.group(1) == view_box